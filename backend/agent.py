@@ -1,56 +1,273 @@
 import os
+import re
+import atexit
+import functools
 import logging
+import queue
 import sys
 import asyncio
+import socket
+import ssl
 import time
-import aiohttp
+from collections import OrderedDict, deque
+import httpx
+import orjson
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from dotenv import load_dotenv
 from livekit import agents
 from livekit.agents import AgentSession, Agent, RoomInputOptions, function_tool, RunContext
 from livekit.agents import inference
 from livekit.agents import io as agents_io
+# Plugins register themselves on import and LiveKit requires that to happen on the
+# main thread, so they are imported here (once, in the worker) rather than per job.
 from livekit.plugins import openai, cartesia
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file. Job processes inherit the worker's
+# environment, so only the first import in a process tree needs to parse it.
+if not os.environ.get('_AGENT_DOTENV_LOADED'):
+    load_dotenv()
+    os.environ['_AGENT_DOTENV_LOADED'] = '1'
+
+# Configure logging with more detail. Records are handed to a background thread
+# through a queue so stdout writes never block the event loop.
+_log_queue: queue.Queue = queue.Queue(maxsize=10000)
+_log_stream_handler = logging.StreamHandler(sys.stdout)
+_log_stream_handler.setFormatter(
+    logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s', datefmt='%H:%M:%S')
+)
+# The format doesn't use thread/process fields, so skip collecting them per record
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of reporting an error.
+
+    If stdout is backpressured (e.g. a slow log collector) the queue fills up;
+    losing log lines is preferable to printing a traceback for each of them.
+    """
 
-# Configure logging with more detail
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+_log_listener = QueueListener(_log_queue, _log_stream_handler, respect_handler_level=True)
+_log_listener.start()
+# Runs on normal exit, sys.exit() and KeyboardInterrupt, flushing queued records
+atexit.register(_log_listener.stop)
+# Set AGENT_LOG_LEVEL=DEBUG to see per-turn and per-participant details. An
+# unknown value falls back to INFO rather than failing the import.
+LOG_LEVEL = os.getenv('AGENT_LOG_LEVEL', 'INFO').strip().upper()
+_log_level_valid = LOG_LEVEL in logging.getLevelNamesMapping()
 logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=LOG_LEVEL if _log_level_valid else logging.INFO,
     handlers=[
-        logging.StreamHandler(sys.stdout)
+        _DroppingQueueHandler(_log_queue)
     ]
 )
 logger = logging.getLogger(__name__)
+if not _log_level_valid:
+    logger.warning("⚠️  Unknown AGENT_LOG_LEVEL %r, using INFO", LOG_LEVEL)
+
+# Use uvloop's libuv-based event loop when available. This runs at import time so
+# the job processes spawned by the worker (which re-import this module) get it too.
+# Set AGENT_EVENT_LOOP=asyncio to fall back to the stdlib loop. An unknown value
+# is treated like the default; EVENT_LOOP always names the loop actually installed.
+_requested_event_loop = os.getenv('AGENT_EVENT_LOOP', 'uvloop').strip().lower()
+_event_loop_valid = _requested_event_loop in ('uvloop', 'asyncio')
+EVENT_LOOP = _requested_event_loop if _event_loop_valid else 'uvloop'
+if EVENT_LOOP == 'uvloop':
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        EVENT_LOOP = 'asyncio'
+if not _event_loop_valid:
+    logger.warning("⚠️  Unknown AGENT_EVENT_LOOP %r, using %s", _requested_event_loop, EVENT_LOOP)
+
+# LiveKit credentials - read once at import
+LIVEKIT_URL = os.getenv('LIVEKIT_URL')
+LIVEKIT_API_KEY = os.getenv('LIVEKIT_API_KEY')
+LIVEKIT_API_SECRET = os.getenv('LIVEKIT_API_SECRET')
+
+# TTS provider keys - read once at import
+CARTESIA_API_KEY = os.getenv('CARTESIA_API_KEY')
+ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY')
 
 # Verify required environment variables
 def verify_env():
     """Verify that required environment variables are set"""
     required_vars = {
-        'LIVEKIT_URL': os.getenv('LIVEKIT_URL'),
-        'LIVEKIT_API_KEY': os.getenv('LIVEKIT_API_KEY'),
-        'LIVEKIT_API_SECRET': os.getenv('LIVEKIT_API_SECRET'),
+        'LIVEKIT_URL': LIVEKIT_URL,
+        'LIVEKIT_API_KEY': LIVEKIT_API_KEY,
+        'LIVEKIT_API_SECRET': LIVEKIT_API_SECRET,
     }
     
     missing = [var for var, value in required_vars.items() if not value]
     if missing:
-        logger.error(f"❌ Missing required environment variables: {', '.join(missing)}")
+        logger.error("❌ Missing required environment variables: %s", ', '.join(missing))
         logger.error("   The agent worker cannot connect to LiveKit Cloud without these variables.")
         return False
     
     logger.info("✅ All required environment variables are set")
-    logger.info(f"   LIVEKIT_URL: {os.getenv('LIVEKIT_URL')}")
-    logger.info(f"   LIVEKIT_API_KEY: {os.getenv('LIVEKIT_API_KEY')[:6]}...")
-    cartesia = os.getenv('CARTESIA_API_KEY')
-    eleven = os.getenv('ELEVENLABS_API_KEY')
-    logger.info(f"   CARTESIA_API_KEY: {cartesia[:6] + '...' if cartesia else 'not set'}")
-    logger.info(f"   ELEVENLABS_API_KEY: {eleven[:6] + '...' if eleven else 'not set'}")
+    logger.info("   LIVEKIT_URL: %s", LIVEKIT_URL)
+    logger.info("   LIVEKIT_API_KEY: %s...", LIVEKIT_API_KEY[:6])
+    logger.info("   CARTESIA_API_KEY: %s", CARTESIA_API_KEY[:6] + '...' if CARTESIA_API_KEY else 'not set')
+    logger.info("   ELEVENLABS_API_KEY: %s", ELEVENLABS_API_KEY[:6] + '...' if ELEVENLABS_API_KEY else 'not set')
+    if not PERPLEXITY_API_KEY:
+        logger.warning("⚠️  PERPLEXITY_API_KEY not set - web search will be unavailable")
     return True
 
 # Backend API configuration
 BACKEND_URL = os.getenv('BACKEND_URL', 'https://shaw.up.railway.app')
 
+# Request bodies are pre-encoded with orjson, so the content type is set explicitly
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Perplexity configuration - only the user message changes between searches
+PERPLEXITY_API_KEY = os.getenv('PERPLEXITY_API_KEY')
+PERPLEXITY_URL = 'https://api.perplexity.ai/chat/completions'
+# Per-attempt timeout ceiling; the actual budget adapts to recent latency (never
+# below the floor). Failed attempts are retried once with a short backoff.
+PERPLEXITY_TIMEOUT_SECONDS = 4.0
+PERPLEXITY_MIN_TIMEOUT_SECONDS = 2.0
+PERPLEXITY_MAX_ATTEMPTS = 2
+PERPLEXITY_RETRY_BACKOFF_SECONDS = 0.25
+_PPLX_HEADERS = {
+    'Authorization': f'Bearer {PERPLEXITY_API_KEY}',
+    'Content-Type': 'application/json',
+} if PERPLEXITY_API_KEY else None
+_PPLX_SYSTEM_MESSAGE = {
+    'role': 'system',
+    'content': 'Provide concise, factual answers suitable for voice interaction while driving. Keep responses under 3 sentences for safety.',
+}
+_PPLX_BODY_TEMPLATE = {
+    'model': 'llama-3.1-sonar-small-128k-online',
+    'temperature': 0.2,
+    # Answers are capped at 3 sentences, so ~90 tokens is plenty
+    'max_tokens': 90,
+    'stream': True,
+}
+# Candidate sentence end: terminal punctuation followed by whitespace (so "72.5" doesn't match)
+_SENTENCE_END_RE = re.compile(r'[.!?](?=\s)')
+# Words whose trailing period doesn't end a sentence ("Dr. Smith", "St. Louis")
+_ABBREVIATIONS = frozenset({
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'st', 'jr', 'sr', 'mt', 'ft', 'vs', 'no',
+    'approx', 'dept', 'est', 'gen', 'gov', 'sen', 'rep', 'inc', 'corp', 'co', 'ltd',
+    'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec',
+})
+# A spoken answer shorter than this is almost certainly a fragment, so keep streaming
+_MIN_FIRST_SENTENCE_CHARS = 40
+
+# TLS context built once and shared by every connection (both clients speak HTTP/2)
+_SSL_CONTEXT = ssl.create_default_context()
+_SSL_CONTEXT.options |= ssl.OP_NO_RENEGOTIATION
+_SSL_CONTEXT.set_alpn_protocols(['h2', 'http/1.1'])
+
+# Shared HTTP/2 clients - created lazily inside the job's event loop and reused so
+# connections stay warm between turns and concurrent requests are multiplexed over
+# a single TLS connection. Perplexity gets its own client so backend writes never
+# compete with searches for connections.
+_http: httpx.AsyncClient | None = None
+_pplx_client: httpx.AsyncClient | None = None
+
+
+# asyncio and uvloop already disable Nagle on TCP sockets; set it explicitly on the
+# pooled connections so small JSON POSTs never wait on a delayed ACK.
+_SOCKET_OPTIONS = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]
+
+
+def _http2_transport(limits: httpx.Limits) -> httpx.AsyncHTTPTransport:
+    return httpx.AsyncHTTPTransport(
+        http2=True,
+        verify=_SSL_CONTEXT,
+        limits=limits,
+        socket_options=_SOCKET_OPTIONS,
+    )
+
+
+def get_http() -> httpx.AsyncClient:
+    """Return the shared backend client, creating it on first use.
+
+    The backend is usually close by, so turn saves get a short timeout and idle
+    connections are not kept around for long.
+    """
+    global _http
+    if _http is None or _http.is_closed:
+        _http = httpx.AsyncClient(
+            transport=_http2_transport(
+                httpx.Limits(max_connections=50, max_keepalive_connections=50, keepalive_expiry=30)
+            ),
+            timeout=5.0,
+            # Turn saves always send an orjson-encoded JSON body
+            headers=_JSON_HEADERS,
+        )
+    return _http
+
+
+def get_pplx_client() -> httpx.AsyncClient:
+    """Return the shared HTTP/2 Perplexity client, creating it on first use.
+
+    Kept separate from the backend client so bursts of turn saves never compete
+    with searches, and idle TLS connections stay warm between questions.
+    """
+    global _pplx_client
+    if _pplx_client is None or _pplx_client.is_closed:
+        _pplx_client = httpx.AsyncClient(
+            transport=_http2_transport(
+                httpx.Limits(max_connections=20, max_keepalive_connections=20, keepalive_expiry=120)
+            ),
+            timeout=httpx.Timeout(PERPLEXITY_TIMEOUT_SECONDS, connect=2.0),
+            # Static auth/content-type headers live on the client, not on each request
+            headers=_PPLX_HEADERS,
+        )
+    return _pplx_client
+
+
+async def prewarm_perplexity() -> None:
+    """Open the Perplexity TLS connection before the driver's first search."""
+    if not _PPLX_HEADERS:
+        return
+    try:
+        await get_pplx_client().head(PERPLEXITY_URL, timeout=2.0)
+    except Exception as e:
+        logger.debug("Perplexity prewarm failed: %s", e)
+
+
+async def prewarm_backend() -> None:
+    """Open the backend connection before the first turn is saved."""
+    try:
+        await get_http().head(f"{BACKEND_URL}/health", timeout=2.0)
+    except Exception as e:
+        logger.debug("Backend prewarm failed: %s", e)
+
+
+async def prewarm_http(backend: bool, perplexity: bool) -> None:
+    """Warm the connections this job will use; failures are logged and ignored."""
+    warmups = []
+    if backend:
+        warmups.append(prewarm_backend())
+    if perplexity:
+        warmups.append(prewarm_perplexity())
+    await asyncio.gather(*warmups)
+
+
+async def close_http() -> None:
+    """Close the shared HTTP clients (called on job shutdown)."""
+    global _http, _pplx_client
+    if _http is not None and not _http.is_closed:
+        await _http.aclose()
+    if _pplx_client is not None and not _pplx_client.is_closed:
+        await _pplx_client.aclose()
+    _http = None
+    _pplx_client = None
+
+
 LANGUAGE_DISPLAY_NAMES = {
     "en-US": "English (US)",
     "en-GB": "English (UK)",
@@ -58,6 +275,143 @@ LANGUAGE_DISPLAY_NAMES = {
     "es-MX": "Spanish (Mexico)",
 }
 
+# Agent prompts, formatted with the driver's preferred language name
+_BASE_INSTRUCTIONS = (
+    "You are a helpful voice AI assistant for CarPlay. "
+    "Keep responses concise, clear, and in {language} for safe driving. "
+    "Default to {language} unless the driver explicitly asks for another language."
+)
+_INSTRUCTIONS_WITH_TOOLS = _BASE_INSTRUCTIONS + (
+    " When users ask questions requiring current information (news, weather, traffic, events, facts), use the web_search tool."
+)
+_INSTRUCTIONS_NO_TOOLS = _BASE_INSTRUCTIONS + " Rely on your built-in knowledge to answer questions."
+_GREETING = "Greet the driver briefly in {language} and ask how you can help them."
+
+
+def _is_session_not_found(response: httpx.Response) -> bool:
+    """Whether a 404 came from the backend's session lookup rather than a missing route."""
+    try:
+        body = orjson.loads(response.content)
+    except orjson.JSONDecodeError:
+        return False
+    return isinstance(body, dict) and body.get('error') == 'Session not found'
+
+
+class TurnBatcher:
+    """Coalesces finalized turns and POSTs them to the backend in batches.
+
+    Turns are flushed every ``flush_ms`` milliseconds or as soon as ``max_batch``
+    turns are queued, whichever comes first. At most ``max_inflight`` POSTs run at
+    once; later batches wait for a slot instead of opening more connections.
+    """
+
+    def __init__(self, session_id: str, flush_ms: int = 250, max_batch: int = 16, max_inflight: int = 32):
+        self._session_id = session_id
+        # URLs are fixed for the session's lifetime
+        self._turns_url = f"{BACKEND_URL}/v1/sessions/{session_id}/turns"
+        self._batch_url = f"{self._turns_url}/batch"
+        self._flush_seconds = flush_ms / 1000
+        self._max_batch = max_batch
+        self._queue: asyncio.Queue[dict[str, str] | None] = asyncio.Queue()
+        self._worker: asyncio.Task | None = None
+        # Strong references to in-flight POSTs so they aren't GC'd mid-flight
+        self._inflight: set[asyncio.Task] = set()
+        self._post_slots = asyncio.Semaphore(max_inflight)
+        # Flipped off if the backend predates the batch endpoint
+        self._batch_supported = True
+
+    def enqueue(self, speaker: str, text: str) -> None:
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+        timestamp = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+        self._queue.put_nowait({"speaker": speaker, "text": text, "timestamp": timestamp})
+
+    async def aclose(self) -> None:
+        """Flush any queued turns and stop the worker."""
+        if self._worker is None:
+            return
+        self._queue.put_nowait(None)
+        await self._worker
+        self._worker = None
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                return
+
+            batch = [first]
+            closing = False
+            deadline = loop.time() + self._flush_seconds
+            while len(batch) < self._max_batch:
+                # Coalesce turns that are already queued without arming a timer
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+
+            # Don't hold up the next batch on the backend round trip
+            task = asyncio.create_task(self._bounded_post(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._on_post_done)
+            if closing:
+                return
+
+    def _on_post_done(self, task: asyncio.Task) -> None:
+        self._inflight.discard(task)
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is None:
+            return
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.error("❌ Error saving turn batch", exc_info=exc)
+        else:
+            logger.warning("❌ Error saving turn batch: %r", exc)
+
+    async def _bounded_post(self, batch: list[dict[str, str]]) -> None:
+        async with self._post_slots:
+            await self._post(batch)
+
+    async def _post(self, batch: list[dict[str, str]]) -> None:
+        if self._batch_supported:
+            response = await get_http().post(
+                self._batch_url,
+                content=orjson.dumps({"turns": batch}),
+            )
+            if response.status_code == 201:
+                logger.debug("✅ Saved %s turns for session %s...", len(batch), self._session_id[:20])
+                return
+            if response.status_code != 404:
+                logger.error("❌ Failed to save turn batch: %s - %s", response.status_code, response.text)
+                return
+            if _is_session_not_found(response):
+                # The route exists but the session doesn't; per-turn saves would 404 too
+                logger.error(
+                    "❌ Session %s... not found, dropping %s turns", self._session_id[:20], len(batch)
+                )
+                return
+            logger.warning("⚠️  Batch turns endpoint unavailable, saving turns individually")
+            self._batch_supported = False
+
+        for turn in batch:
+            await save_turn(
+                self._session_id, turn["speaker"], turn["text"], turn["timestamp"], turns_url=self._turns_url
+            )
+
 
 class TranscriptManager:
     """Aggregates streamed transcription chunks and saves finalized turns."""
@@ -71,6 +425,52 @@ class TranscriptManager:
             'assistant': {},
         }
         self._pending_user_partial: str | None = None
+        self._batcher = TurnBatcher(session_id) if session_id else None
+
+    async def drain(self) -> None:
+        """Flush all queued turns to the backend."""
+        if self._batcher:
+            await self._batcher.aclose()
+
+    def attach(self, agent_session: AgentSession) -> None:
+        """Register this manager's transcription handlers on an agent session."""
+        if self._batcher is None:
+            # No session to save turns to, so events would only be normalized and dropped
+            logger.debug("📝 No session_id - transcript handlers not registered")
+            return
+        # Note: Event handlers must be synchronous - turns are handed to the batcher with put_nowait
+        agent_session.on("user_input_transcribed", self.on_user_input_transcribed)
+        agent_session.on("user_speech_committed", self.on_user_speech_committed)
+        agent_session.on("agent_speech_committed", self.on_agent_speech_committed)
+        agent_session.on("conversation_item_added", self.on_conversation_item_added)
+
+    def on_user_input_transcribed(self, event) -> None:
+        self.handle_user_transcript_chunk(event.transcript, event.is_final)
+
+    def on_user_speech_committed(self, msg: agents.llm.ChatMessage) -> None:
+        if not msg:
+            return
+        if logger.isEnabledFor(logging.DEBUG):
+            text = getattr(msg, "text_content", None)
+            if text:
+                logger.debug("🗣️ Committed USER speech (%s chars) — saving turn", len(text))
+        self.handle_user_final_text(msg)
+
+    def on_agent_speech_committed(self, msg: agents.llm.ChatMessage) -> None:
+        if not msg:
+            return
+        if logger.isEnabledFor(logging.DEBUG):
+            text = getattr(msg, "text_content", None)
+            if text:
+                logger.debug("🗣️ Committed AGENT speech (%s chars) — saving turn", len(text))
+        self.handle_assistant_text(msg)
+
+    def on_conversation_item_added(self, event) -> None:
+        try:
+            message = getattr(event, "item", None) or event
+            self.handle_conversation_item(message)
+        except Exception as e:
+            logger.error("❌ Error handling conversation_item_added: %s", e)
 
     def handle_user_transcript_chunk(self, transcript: str, is_final: bool) -> None:
         normalized = self._normalize_text(transcript)
@@ -109,8 +509,8 @@ class TranscriptManager:
         flattened = self._flatten_text(text)
         if not flattened:
             return ""
-        normalized = " ".join(flattened.strip().split())
-        return normalized
+        # split() already discards leading/trailing whitespace
+        return " ".join(flattened.split())
 
     def _flatten_text(self, value: object | None) -> str:
         if value is None:
@@ -152,15 +552,15 @@ class TranscriptManager:
         return value
 
     def _maybe_save_turn(self, speaker: str, text: str) -> None:
-        if not self._session_id or not text:
+        if not self._batcher or not text:
             return
 
         if self._is_duplicate(speaker, text):
-            logger.debug(f"🔁 Skipping duplicate {speaker} transcript chunk")
+            logger.debug("🔁 Skipping duplicate %s transcript chunk", speaker)
             return
 
-        logger.debug(f"📝 Queueing {speaker} turn ({len(text)} chars)")
-        asyncio.create_task(save_turn(self._session_id, speaker, text))
+        logger.debug("📝 Queueing %s turn (%s chars)", speaker, len(text))
+        self._batcher.enqueue(speaker, text)
 
     def _is_duplicate(self, speaker: str, text: str) -> bool:
         now = time.monotonic()
@@ -200,7 +600,212 @@ class AssistantTranscriptSink(agents_io.TextOutput):
         if combined:
             self._transcript_manager.handle_assistant_text(combined)
 
+class SearchCache:
+    """Small LRU cache of recent web search answers with a time-to-live."""
+
+    _PUNCTUATION_RE = re.compile(r'[^\w\s]')
+
+    def __init__(self, maxsize: int = 64, ttl_seconds: float = 90.0):
+        self._maxsize = maxsize
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    @classmethod
+    def normalize(cls, query: str) -> str:
+        """Key near-identical queries the same way (case, punctuation, spacing)."""
+        return " ".join(cls._PUNCTUATION_RE.sub(" ", query.lower()).split())
+
+    def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, answer = entry
+        if time.monotonic() - stored_at > self._ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return answer
+
+    def put(self, key: str, answer: str) -> None:
+        self._entries[key] = (time.monotonic(), answer)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+
+class CircuitBreaker:
+    """Skips calls to a failing upstream for a cooldown after repeated failures."""
+
+    def __init__(self, failure_threshold: int = 3, cooldown_seconds: float = 30.0):
+        self._failure_threshold = failure_threshold
+        self._cooldown_seconds = cooldown_seconds
+        self._failures = 0
+        self._open_until = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return time.monotonic() < self._open_until
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._open_until = 0.0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self._failure_threshold:
+            logger.warning("⚠️  Opening circuit for %.0fs after %d failures", self._cooldown_seconds, self._failures)
+            self._open_until = time.monotonic() + self._cooldown_seconds
+            self._failures = 0
+
+
+class AdaptiveTimeout:
+    """Derives a request timeout from the p95 of recently observed latencies.
+
+    Until ``min_samples`` latencies have been recorded the ceiling is used. Timed-out
+    attempts are recorded as taking the ceiling, so a slowdown pushes the timeout
+    back up instead of every attempt failing at the floor.
+    """
+
+    def __init__(
+        self,
+        floor_seconds: float,
+        ceiling_seconds: float,
+        window: int = 50,
+        min_samples: int = 5,
+        headroom: float = 1.5,
+    ):
+        self._floor = floor_seconds
+        self._ceiling = ceiling_seconds
+        self._min_samples = min_samples
+        self._headroom = headroom
+        self._samples: deque[float] = deque(maxlen=window)
+
+    @property
+    def seconds(self) -> float:
+        if len(self._samples) < self._min_samples:
+            return self._ceiling
+        ordered = sorted(self._samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return min(self._ceiling, max(self._floor, p95 * self._headroom))
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def record_timeout(self) -> None:
+        self._samples.append(self._ceiling)
+
+
+_search_cache = SearchCache()
+_pplx_breaker = CircuitBreaker()
+_pplx_timeout = AdaptiveTimeout(PERPLEXITY_MIN_TIMEOUT_SECONDS, PERPLEXITY_TIMEOUT_SECONDS)
+
+
+def _is_sentence_end(text: str, pos: int) -> bool:
+    """Whether the '.', '!' or '?' at ``pos`` really ends a sentence."""
+    if text[pos] != '.':
+        return True
+    head = text[:pos]
+    parts = head.rsplit(None, 1)
+    word = parts[-1].lstrip('("\'') if parts else ''
+    if not word:
+        return False
+    # "Dr.", "U.S.", "a.m.", initials like "J."
+    if word.lower() in _ABBREVIATIONS or '.' in word or (len(word) == 1 and word.isalpha()):
+        return False
+    if word.isdigit():
+        # List markers ("1.", "Options: 2.") aren't sentence ends; "in 1999." is
+        before = head[:len(head) - len(word)].rstrip(' \t')
+        return bool(before) and before[-1] not in '\n:'
+    return True
+
+
+def _find_first_sentence_end(text: str, start: int = 0) -> int | None:
+    """Return the end offset of the first complete, long-enough sentence in ``text``."""
+    for match in _SENTENCE_END_RE.finditer(text, start):
+        if match.end() < _MIN_FIRST_SENTENCE_CHARS or not _is_sentence_end(text, match.start()):
+            continue
+        if len(text[:match.end()].strip()) >= _MIN_FIRST_SENTENCE_CHARS:
+            return match.end()
+    return None
+
+
+async def _stream_perplexity_first_sentence(query: str) -> str:
+    """Stream a Perplexity answer and return as soon as the first sentence is complete.
+
+    Abbreviations, list markers and very short fragments don't count as a sentence;
+    if no usable break arrives, the whole (max_tokens-capped) answer is returned.
+    Raises httpx.HTTPStatusError if Perplexity responds with an error status.
+    """
+    text = ""
+    async with get_pplx_client().stream(
+        'POST',
+        PERPLEXITY_URL,
+        content=orjson.dumps({
+            **_PPLX_BODY_TEMPLATE,
+            'messages': [_PPLX_SYSTEM_MESSAGE, {'role': 'user', 'content': query}],
+        }),
+    ) as response:
+        if response.is_error:
+            # Read the body so the error text is available to the caller
+            await response.aread()
+            response.raise_for_status()
+
+        async for line in response.aiter_lines():
+            if not line.startswith('data:'):
+                continue
+            payload = line[5:].strip()
+            if payload == '[DONE]':
+                break
+            choices = orjson.loads(payload).get('choices') or [{}]
+            delta = (choices[0].get('delta') or {}).get('content')
+            if not delta:
+                continue
+            # Only the new chunk (plus the previous char) can complete a sentence
+            search_from = max(len(text) - 1, 0)
+            text += delta
+            end = _find_first_sentence_end(text, search_from)
+            if end is not None:
+                return text[:end].strip()
+
+    # No usable sentence break; the whole answer is already capped by max_tokens
+    return text.strip()
+
+
+async def search_perplexity(query: str) -> str:
+    """Run a Perplexity search, retrying timeouts, connection errors and 5xx responses.
+
+    Raises the last error if every attempt fails.
+    """
+    for attempt in range(1, PERPLEXITY_MAX_ATTEMPTS + 1):
+        try:
+            started = time.monotonic()
+            result = await asyncio.wait_for(
+                _stream_perplexity_first_sentence(query), timeout=_pplx_timeout.seconds
+            )
+            _pplx_timeout.record(time.monotonic() - started)
+            return result
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code < 500 or attempt == PERPLEXITY_MAX_ATTEMPTS:
+                raise
+            logger.warning("⚠️  Perplexity returned %s, retrying", e.response.status_code)
+        except (asyncio.TimeoutError, httpx.TransportError) as e:
+            if isinstance(e, (asyncio.TimeoutError, httpx.TimeoutException)):
+                _pplx_timeout.record_timeout()
+            if attempt == PERPLEXITY_MAX_ATTEMPTS:
+                raise
+            logger.warning("⚠️  Perplexity attempt failed (%r), retrying", e)
+        await asyncio.sleep(PERPLEXITY_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+
 class Assistant(Agent):
+    # Instruction templates keyed by (tool_calling_enabled, web_search_enabled)
+    _INSTRUCTIONS = {
+        (True, True): _INSTRUCTIONS_WITH_TOOLS,
+        (True, False): _INSTRUCTIONS_NO_TOOLS,
+        (False, True): _INSTRUCTIONS_NO_TOOLS,
+        (False, False): _INSTRUCTIONS_NO_TOOLS,
+    }
+
     def __init__(
         self,
         tool_calling_enabled: bool = True,
@@ -211,16 +816,8 @@ class Assistant(Agent):
     ) -> None:
         language_name = preferred_language_name or "English (US)"
         # Update instructions based on tool availability
-        base_instructions = (
-            f"You are a helpful voice AI assistant for CarPlay. "
-            f"Keep responses concise, clear, and in {language_name} for safe driving. "
-            f"Default to {language_name} unless the driver explicitly asks for another language."
-        )
-
-        if tool_calling_enabled and web_search_enabled:
-            instructions = base_instructions + " When users ask questions requiring current information (news, weather, traffic, events, facts), use the web_search tool."
-        else:
-            instructions = base_instructions + " Rely on your built-in knowledge to answer questions."
+        template = self._INSTRUCTIONS[(bool(tool_calling_enabled), bool(web_search_enabled))]
+        instructions = template.format(language=language_name)
 
         # Configure STT for hybrid mode (defaults to Deepgram via LiveKit Inference)
         # Provide a descriptor string "provider/model:language" or construct explicitly
@@ -258,51 +855,59 @@ class Assistant(Agent):
         if not self._web_search_enabled:
             return "Web search is currently disabled in your settings."
 
+        cache_key = SearchCache.normalize(query)
+        cached = _search_cache.get(cache_key)
+        if cached is not None:
+            logger.info("🔍 Perplexity cache hit: %s", query)
+            return cached
+
+        if not _PPLX_HEADERS:
+            logger.error("PERPLEXITY_API_KEY not found")
+            return "Search unavailable: API key not configured"
+
+        if _pplx_breaker.is_open:
+            logger.warning("⚠️  Perplexity circuit open, skipping search: %s", query)
+            return "Search is temporarily unavailable."
+
+        logger.info("🔍 Perplexity search: %s", query)
+
         try:
-            api_key = os.getenv('PERPLEXITY_API_KEY')
-            if not api_key:
-                logger.error("PERPLEXITY_API_KEY not found")
-                return "Search unavailable: API key not configured"
-
-            logger.info(f"🔍 Perplexity search: {query}")
-
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    'https://api.perplexity.ai/chat/completions',
-                    headers={
-                        'Authorization': f'Bearer {api_key}',
-                        'Content-Type': 'application/json'
-                    },
-                    json={
-                        'model': 'llama-3.1-sonar-small-128k-online',
-                        'messages': [
-                            {
-                                'role': 'system',
-                                'content': 'Provide concise, factual answers suitable for voice interaction while driving. Keep responses under 3 sentences for safety.'
-                            },
-                            {
-                                'role': 'user',
-                                'content': query
-                            }
-                        ],
-                        'temperature': 0.2,
-                        'max_tokens': 200,
-                    },
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        result = data['choices'][0]['message']['content']
-                        logger.info(f"✅ Perplexity result: {result[:100]}...")
-                        return result
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"❌ Perplexity API error: {response.status} - {error_text}")
-                        return "I'm having trouble searching the web right now."
+            result = await search_perplexity(query)
+        except httpx.HTTPStatusError as e:
+            # Only upstream outages count toward the breaker; a 4xx is about this
+            # request (or our key/quota) and shouldn't block search for everyone
+            if e.response.status_code >= 500:
+                _pplx_breaker.record_failure()
+            logger.error("❌ Perplexity API error: %s - %s", e.response.status_code, e.response.text)
+            return "I'm having trouble searching the web right now."
         except Exception as e:
-            logger.error(f"❌ Web search error: {e}")
+            if isinstance(e, (asyncio.TimeoutError, httpx.TransportError)):
+                _pplx_breaker.record_failure()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.exception("❌ Web search error")
+            else:
+                logger.warning("❌ Web search error: %r", e)
             return "Search is temporarily unavailable."
 
+        _pplx_breaker.record_success()
+        logger.debug("✅ Perplexity result (%d chars)", len(result))
+        if result:
+            _search_cache.put(cache_key, result)
+        return result
+
+# TTS voice descriptor: "provider/model:voice-id"
+_VOICE_RE = re.compile(r'(?P<provider>cartesia|elevenlabs)/(?P<model>[^:]*):(?P<voice>.+)', re.DOTALL)
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_voice_descriptor(voice_descriptor: str) -> tuple[str, str, str] | None:
+    """Split "provider/model:voice-id" into its parts, or return None if malformed."""
+    match = _VOICE_RE.fullmatch(voice_descriptor)
+    if match is None:
+        return None
+    return match['provider'], match['model'] or "sonic-3", match['voice']
+
+
 def create_tts_from_voice_descriptor(voice_descriptor: str):
     """Create a TTS instance from a voice descriptor string.
     
@@ -315,101 +920,110 @@ def create_tts_from_voice_descriptor(voice_descriptor: str):
     """
     if not voice_descriptor or not isinstance(voice_descriptor, str):
         return voice_descriptor
-    
-    # Parse Cartesia format: "cartesia/sonic-3:voice-id"
-    if voice_descriptor.startswith("cartesia/"):
-        try:
-            # Extract model and voice ID
-            # Format: "cartesia/sonic-3:voice-id"
-            parts = voice_descriptor.split(":", 1)
-            if len(parts) == 2:
-                model_part = parts[0]  # "cartesia/sonic-3"
-                voice_id = parts[1]     # "voice-id"
-                
-                # Extract model name (e.g., "sonic-3" from "cartesia/sonic-3")
-                model = model_part.split("/")[-1] if "/" in model_part else "sonic-3"
-                
-                # Check if Cartesia API key is available
-                if os.getenv('CARTESIA_API_KEY'):
-                    logger.info(f"🎤 Using Cartesia plugin directly (bypasses LiveKit Inference TTS limit)")
-                    return cartesia.TTS(model=model, voice=voice_id)
-                else:
-                    logger.warning(f"⚠️  CARTESIA_API_KEY not set, falling back to LiveKit Inference")
-                    return voice_descriptor
-            else:
-                logger.warning(f"⚠️  Invalid Cartesia voice format: {voice_descriptor}")
-                return voice_descriptor
-        except Exception as e:
-            logger.error(f"❌ Error creating Cartesia TTS: {e}")
-            return voice_descriptor
-    
-    if voice_descriptor.startswith("elevenlabs/"):
-        # Fallback to LiveKit Inference for ElevenLabs
+
+    parsed = _parse_voice_descriptor(voice_descriptor)
+    if parsed is None:
+        if voice_descriptor.startswith("cartesia/"):
+            logger.warning("⚠️  Invalid Cartesia voice format: %s", voice_descriptor)
+        return voice_descriptor
+
+    provider, model, voice_id = parsed
+    if provider != "cartesia":
+        # ElevenLabs goes through LiveKit Inference
         return voice_descriptor
 
-    return voice_descriptor
+    if not CARTESIA_API_KEY:
+        logger.warning("⚠️  CARTESIA_API_KEY not set, falling back to LiveKit Inference")
+        return voice_descriptor
+    try:
+        logger.info("🎤 Using Cartesia plugin directly (bypasses LiveKit Inference TTS limit)")
+        return cartesia.TTS(model=model, voice=voice_id, api_key=CARTESIA_API_KEY)
+    except Exception as e:
+        logger.error("❌ Error creating Cartesia TTS: %s", e)
+        return voice_descriptor
 
-async def save_turn(session_id: str, speaker: str, text: str):
-    """Save a conversation turn to the backend database
+async def save_turn(
+    session_id: str,
+    speaker: str,
+    text: str,
+    timestamp: str | None = None,
+    turns_url: str | None = None,
+):
+    """Save a single conversation turn to the backend database
     
-    This function is called by the agent when user speech or agent speech is committed.
+    Turns are normally sent in bulk by TurnBatcher; this per-turn endpoint is the
+    fallback for backends without the batch endpoint. Pass ``turns_url`` to reuse
+    a precomputed session URL.
     The turns are stored in the database and later used to generate summaries.
     """
-    if not session_id or not text.strip():
-        logger.warning(f"⚠️  Skipping turn save - missing session_id or empty text")
+    stripped = text.strip() if session_id else ""
+    if not stripped:
+        logger.warning("⚠️  Skipping turn save - missing session_id or empty text")
         return
 
     try:
-        url = f"{BACKEND_URL}/v1/sessions/{session_id}/turns"
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                url,
-                json={
-                    "speaker": speaker,
-                    "text": text.strip()
-                },
-                headers={"Content-Type": "application/json"},
-                timeout=aiohttp.ClientTimeout(total=5)
-            ) as response:
-                if response.status == 201:
-                    logger.debug(f"✅ Saved {speaker} turn for session {session_id[:20]}...")
-                else:
-                    error_text = await response.text()
-                    logger.error(f"❌ Failed to save turn: {response.status} - {error_text}")
-                    logger.error(f"   Session ID: {session_id[:20]}..., Speaker: {speaker}")
-    except asyncio.TimeoutError:
-        logger.error(f"❌ Timeout saving turn for session {session_id[:20]}...")
+        response = await get_http().post(
+            turns_url or f"{BACKEND_URL}/v1/sessions/{session_id}/turns",
+            content=orjson.dumps({
+                "speaker": speaker,
+                "text": stripped,
+                **({"timestamp": timestamp} if timestamp else {}),
+            }),
+        )
+        if response.status_code == 201:
+            logger.debug("✅ Saved %s turn for session %s...", speaker, session_id[:20])
+        else:
+            logger.error("❌ Failed to save turn: %s - %s", response.status_code, response.text)
+            logger.error("   Session ID: %s..., Speaker: %s", session_id[:20], speaker)
+    except httpx.TimeoutException:
+        logger.error("❌ Timeout saving turn for session %s...", session_id[:20])
     except Exception as e:
-        logger.error(f"❌ Error saving turn: {e}")
-        logger.error(f"   Session ID: {session_id[:20]}..., Speaker: {speaker}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.exception("❌ Error saving turn for session %s..., speaker %s", session_id[:20], speaker)
+        else:
+            logger.warning("❌ Error saving turn for session %s..., speaker %s: %r", session_id[:20], speaker, e)
+
+def _log_participants(ctx: agents.JobContext) -> None:
+    """Log the room's participants, plus identities and tracks at DEBUG."""
+    room = ctx.room
+    # Snapshot once; the same list feeds the count and the DEBUG listing
+    participants = list(room.remote_participants.values())
+    logger.info("👥 Remote participants in room: %s", len(participants))
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    local_participant = room.local_participant
+    logger.debug("🤖 Agent identity: %s", local_participant.identity if local_participant else 'unknown')
+    for participant in participants:
+        logger.debug("   - %s (SID: %s)", participant.identity, participant.sid)
+        for track_pub in participant.track_publications.values():
+            logger.debug("     Track: %s (%s) - subscribed: %s", track_pub.name, track_pub.kind, track_pub.subscribed)
+
 
 async def entrypoint(ctx: agents.JobContext):
     """Entry point for the LiveKit agent - supports both Realtime and Turn-based modes"""
-    logger.info("=" * 60)
-    logger.info(f"🎙️  Agent entrypoint called!")
-    logger.info(f"   Room name: {ctx.room.name}")
-    logger.info(f"   Room SID: {ctx.room.sid}")
-    logger.info(f"   Job ID: {ctx.job.id}")
-    logger.info(f"   Job metadata: {ctx.job.metadata}")
-    logger.info("=" * 60)
+    logger.info("🎙️  Agent entrypoint called! Room: %s, Job ID: %s", ctx.room.name, ctx.job.id)
+    logger.debug("   Room SID: %s", ctx.room.sid)
+    logger.debug("   Job metadata: %s", ctx.job.metadata)
     
     # Note: Room is NOT connected yet - AgentSession.start() will connect automatically
     # RoomIO will automatically handle track subscription when AgentSession starts
     # The room may not exist yet - LiveKit will create it automatically when agent joins
 
     # Parse metadata from dispatch
-    import json
     metadata = {}
     session_id = None
     try:
         if ctx.job.metadata:
-            metadata = json.loads(ctx.job.metadata)
-            logger.info(f"📋 Received metadata: {metadata}")
+            parsed = orjson.loads(ctx.job.metadata)
+            if not isinstance(parsed, dict):
+                raise ValueError(f"expected a JSON object, got {type(parsed).__name__}")
+            metadata = parsed
+            logger.debug("📋 Received metadata: %s", metadata)
             session_id = metadata.get('session_id')
             if session_id:
-                logger.info(f"📝 Session ID: {session_id}")
+                logger.info("📝 Session ID: %s", session_id)
     except Exception as e:
-        logger.warning(f"Failed to parse metadata: {e}")
+        logger.warning("Failed to parse metadata: %s", e)
 
     realtime_mode = metadata.get('realtime', False)  # Backend sends true for full Realtime, false for hybrid
     voice = metadata.get('voice', 'cartesia/sonic-3:9626c31c-bec5-4cca-baa8-f8ba9e84c8bc')
@@ -423,93 +1037,57 @@ async def entrypoint(ctx: agents.JobContext):
     if not isinstance(language_label, str) or not language_label.strip():
         language_label = LANGUAGE_DISPLAY_NAMES.get(language, language)
 
-    logger.info(f"🔧 Tool settings - Tool calling: {tool_calling_enabled}, Web search: {web_search_enabled}")
-    logger.info(f"🌐 STT language: {language} ({language_label})")
+    logger.info("🔧 Tool settings - Tool calling: %s, Web search: %s", tool_calling_enabled, web_search_enabled)
+    logger.info("🌐 STT language: %s (%s)", language, language_label)
     transcript_manager = TranscriptManager(session_id)
 
+    # Warm the backend/Perplexity connections in the background while the session
+    # is built and joins the room; the greeting never waits on it
+    prewarm_task = asyncio.create_task(
+        prewarm_http(
+            backend=bool(session_id),
+            perplexity=bool(tool_calling_enabled and web_search_enabled),
+        )
+    )
+
+    async def on_shutdown():
+        prewarm_task.cancel()
+        # Flush queued turns before the shared clients are closed
+        await transcript_manager.drain()
+        await close_http()
+
+    ctx.add_shutdown_callback(on_shutdown)
+
+    # Same agent configuration for both modes; only the session's models differ
+    assistant = Assistant(
+        tool_calling_enabled=tool_calling_enabled,
+        web_search_enabled=web_search_enabled,
+        preferred_language_name=language_label,
+        stt_model="deepgram/nova-3",
+        stt_language=language,
+    )
+
     try:
         if realtime_mode:
             # Full OpenAI Realtime mode (audio I/O) - Pro only
-            logger.info(f"🎙️  Using OpenAI Realtime (Full Audio I/O)")
-            logger.info(f"📢 Realtime voice: {voice}")
+            mode_label = "Realtime"
+            logger.info("🎙️  Using OpenAI Realtime (Full Audio I/O)")
+            logger.info("📢 Realtime voice: %s", voice)
 
             # Full Realtime model with audio input and output
-            realtime_model = openai.realtime.RealtimeModel(
-                voice=voice,  # OpenAI voice: alloy, echo, fable, onyx, nova, shimmer
-                temperature=0.8,
-                modalities=["text", "audio"],  # Full audio I/O
-            )
-
-            agent_session = AgentSession(llm=realtime_model)
-            agent_session.output.transcription = AssistantTranscriptSink(transcript_manager)
-
-            # Set up event handlers for transcription capture
-            # Note: Event handlers must be synchronous - use asyncio.create_task for async work
-            @agent_session.on("user_input_transcribed")
-            def on_user_transcribed(event):
-                transcript_manager.handle_user_transcript_chunk(event.transcript, event.is_final)
-
-            @agent_session.on("user_speech_committed")
-            def on_user_speech(msg: agents.llm.ChatMessage):
-                if msg:
-                    text = getattr(msg, "text_content", None)
-                    if text:
-                        logger.info(f"🗣️ Committed USER speech ({len(text)} chars) — saving turn")
-                    transcript_manager.handle_user_final_text(msg)
-
-            @agent_session.on("agent_speech_committed")
-            def on_agent_speech(msg: agents.llm.ChatMessage):
-                if msg:
-                    text = getattr(msg, "text_content", None)
-                    if text:
-                        logger.info(f"🗣️ Committed AGENT speech ({len(text)} chars) — saving turn")
-                    transcript_manager.handle_assistant_text(msg)
-
-            @agent_session.on("conversation_item_added")
-            def on_conversation_item(event):
-                try:
-                    message = getattr(event, "item", None) or event
-                    transcript_manager.handle_conversation_item(message)
-                except Exception as e:
-                    logger.error(f"❌ Error handling conversation_item_added: {e}")
-
-            # Configure room input options
-            # RoomIO (created automatically by AgentSession) handles track subscription
-            room_input_options = RoomInputOptions(close_on_disconnect=False)
-            logger.info("🎤 Starting full Realtime agent session...")
-            logger.info("   RoomIO will automatically subscribe to audio tracks")
-            
-            await agent_session.start(
-                room=ctx.room,
-                agent=Assistant(
-                    tool_calling_enabled=tool_calling_enabled,
-                    web_search_enabled=web_search_enabled,
-                    preferred_language_name=language_label,
-                    stt_model="deepgram/nova-3",
-                    stt_language=language,
+            session_kwargs = {
+                "llm": openai.realtime.RealtimeModel(
+                    voice=voice,  # OpenAI voice: alloy, echo, fable, onyx, nova, shimmer
+                    temperature=0.8,
+                    modalities=["text", "audio"],  # Full audio I/O
                 ),
-                room_input_options=room_input_options,
-            )
-            
-            # Now that we're connected, log participants and tracks
-            logger.info("✅ Agent session started - room connected")
-            logger.info(f"🤖 Agent identity: {ctx.room.local_participant.identity if ctx.room.local_participant else 'unknown'}")
-            logger.info(f"👥 Remote participants in room: {len(ctx.room.remote_participants)}")
-            for participant in ctx.room.remote_participants.values():
-                logger.info(f"   - {participant.identity} (SID: {participant.sid})")
-                for track_pub in participant.track_publications.values():
-                    logger.info(f"     Track: {track_pub.name} ({track_pub.kind}) - subscribed: {track_pub.subscribed}")
-
-            await agent_session.generate_reply(
-                instructions=f"Greet the driver briefly in {language_label} and ask how you can help them."
-            )
-
-            logger.info("✅ Full Realtime agent session started successfully")
+            }
         else:
             # Hybrid mode: LiveKit Inference LLM + TTS (Cartesia/ElevenLabs via plugin or LiveKit Inference)
-            logger.info(f"💰 Using HYBRID mode: LiveKit Inference LLM + {voice}")
-            logger.info(f"📢 LLM model: {model}")
-            logger.info(f"📢 TTS voice: {voice}")
+            mode_label = "Hybrid"
+            logger.info("💰 Using HYBRID mode: LiveKit Inference LLM + %s", voice)
+            logger.info("📢 LLM model: %s", model)
+            logger.info("📢 TTS voice: %s", voice)
 
             # Use LiveKit Inference for LLM (not OpenAI Realtime)
             # Model format: "openai/gpt-4o", "openai/gpt-4o-mini", etc.
@@ -521,77 +1099,46 @@ async def entrypoint(ctx: agents.JobContext):
             tts_instance = create_tts_from_voice_descriptor(voice)
             
             if isinstance(tts_instance, str):
-                logger.info(f"📢 Using LiveKit Inference TTS (counts against connection limit)")
+                logger.info("📢 Using LiveKit Inference TTS (counts against connection limit)")
             else:
-                logger.info(f"📢 Using TTS plugin directly (does NOT count against LiveKit Inference limit)")
+                logger.info("📢 Using TTS plugin directly (does NOT count against LiveKit Inference limit)")
 
             # AgentSession with LiveKit Inference LLM + TTS (plugin or Inference)
-            agent_session = AgentSession(
-                llm=llm_model,  # LiveKit Inference LLM (string descriptor)
-                tts=tts_instance,  # TTS plugin instance or LiveKit Inference descriptor
-                stt=inference.STT.from_model_string(f"deepgram/nova-3:{language}"),
-            )
-            agent_session.output.transcription = AssistantTranscriptSink(transcript_manager)
-
-            # Set up event handlers for transcription capture
-            # Note: Event handlers must be synchronous - use asyncio.create_task for async work
-            @agent_session.on("user_input_transcribed")
-            def on_user_transcribed(event):
-                transcript_manager.handle_user_transcript_chunk(event.transcript, event.is_final)
-
-            @agent_session.on("user_speech_committed")
-            def on_user_speech(msg: agents.llm.ChatMessage):
-                if msg:
-                    transcript_manager.handle_user_final_text(msg)
-
-            @agent_session.on("agent_speech_committed")
-            def on_agent_speech(msg: agents.llm.ChatMessage):
-                if msg:
-                    transcript_manager.handle_assistant_text(msg)
-
-            @agent_session.on("conversation_item_added")
-            def on_conversation_item(event):
-                try:
-                    message = getattr(event, "item", None) or event
-                    transcript_manager.handle_conversation_item(message)
-                except Exception as e:
-                    logger.error(f"❌ Error handling conversation_item_added: {e}")
-
-            # Configure room input options
-            # RoomIO (created automatically by AgentSession) handles track subscription
-            room_input_options = RoomInputOptions(close_on_disconnect=False)
-            logger.info("🎤 Starting hybrid agent session...")
-            logger.info("   RoomIO will automatically subscribe to audio tracks")
-            
-            await agent_session.start(
-                room=ctx.room,
-                agent=Assistant(
-                    tool_calling_enabled=tool_calling_enabled,
-                    web_search_enabled=web_search_enabled,
-                    preferred_language_name=language_label,
-                    stt_model="deepgram/nova-3",
-                    stt_language=language,
-                ),
-                room_input_options=room_input_options,
-            )
-            
-            # Now that we're connected, log participants and tracks
-            logger.info("✅ Hybrid agent session started - room connected")
-            logger.info(f"🤖 Agent identity: {ctx.room.local_participant.identity if ctx.room.local_participant else 'unknown'}")
-            logger.info(f"👥 Remote participants in room: {len(ctx.room.remote_participants)}")
-            for participant in ctx.room.remote_participants.values():
-                logger.info(f"   - {participant.identity} (SID: {participant.sid})")
-                for track_pub in participant.track_publications.values():
-                    logger.info(f"     Track: {track_pub.name} ({track_pub.kind}) - subscribed: {track_pub.subscribed}")
-
-            await agent_session.generate_reply(
-                instructions=f"Greet the driver briefly in {language_label} and ask how you can help them."
-            )
+            session_kwargs = {
+                "llm": llm_model,  # LiveKit Inference LLM (string descriptor)
+                "tts": tts_instance,  # TTS plugin instance or LiveKit Inference descriptor
+                "stt": inference.STT.from_model_string(f"deepgram/nova-3:{language}"),
+            }
+
+        agent_session = AgentSession(**session_kwargs)
+        agent_session.output.transcription = AssistantTranscriptSink(transcript_manager)
+        transcript_manager.attach(agent_session)
+
+        # Configure room input options
+        # RoomIO (created automatically by AgentSession) handles track subscription
+        room_input_options = RoomInputOptions(close_on_disconnect=False)
+        logger.info("🎤 Starting %s agent session...", mode_label)
+        logger.info("   RoomIO will automatically subscribe to audio tracks")
+        
+        await agent_session.start(
+            room=ctx.room,
+            agent=assistant,
+            room_input_options=room_input_options,
+        )
+        
+        logger.info("✅ %s agent session started - room connected", mode_label)
+        # Participant/track details are diagnostics only; log them after the
+        # greeting has been requested rather than in front of it
+        asyncio.get_running_loop().call_soon(_log_participants, ctx)
+
+        await agent_session.generate_reply(
+            instructions=_GREETING.format(language=language_label)
+        )
 
-            logger.info("✅ Hybrid agent session started successfully")
+        logger.info("✅ %s agent session started successfully", mode_label)
 
     except Exception as e:
-        logger.error(f"❌ Agent error: {e}")
+        logger.error("❌ Agent error: %s", e)
         raise
 
 if __name__ == "__main__":
@@ -605,8 +1152,9 @@ if __name__ == "__main__":
         sys.exit(1)
     
     # Log agent configuration
-    logger.info(f"📋 Agent name: agent")
-    logger.info(f"📋 Entrypoint: entrypoint")
+    logger.info("📋 Agent name: agent")
+    logger.info("📋 Entrypoint: entrypoint")
+    logger.info("📋 Event loop: %s", EVENT_LOOP)
     logger.info("=" * 60)
     logger.info("🔌 Connecting to LiveKit Cloud...")
     logger.info("   The agent will listen for dispatches and join rooms as needed.")
@@ -617,9 +1165,9 @@ if __name__ == "__main__":
         # IMPORTANT: agent_name must match the name used in dispatchAgentToRoom() in livekit.js
         # This is "agent" for Railway/local workers, or "shaw-voice-assistant" for LiveKit Cloud deployment
         agent_name = os.getenv("LIVEKIT_AGENT_NAME", "agent")
-        logger.info(f"📋 Agent name for dispatch: {agent_name}")
-        logger.info(f"   This must match the agent name used in dispatchAgentToRoom()")
-        logger.info(f"   Set LIVEKIT_AGENT_NAME env var to override (default: 'agent')")
+        logger.info("📋 Agent name for dispatch: %s", agent_name)
+        logger.info("   This must match the agent name used in dispatchAgentToRoom()")
+        logger.info("   Set LIVEKIT_AGENT_NAME env var to override (default: 'agent')")
         
         agents.cli.run_app(
             agents.WorkerOptions(
@@ -630,6 +1178,6 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("🛑 Agent worker stopped by user")
     except Exception as e:
-        logger.error(f"❌ Agent worker failed to start: {e}")
+        logger.error("❌ Agent worker failed to start: %s", e)
         logger.exception("Full error details:")
         sys.exit(1)
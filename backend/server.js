@@ -786,6 +786,59 @@ app.post('/v1/sessions/:id/turns', (req, res) => {
   }
 });
 
+// 3b. POST /v1/sessions/{id}/turns/batch - Log several conversation turns at once (no auth for agent)
+const MAX_TURNS_PER_BATCH = 100;
+
+app.post('/v1/sessions/:id/turns/batch', async (req, res) => {
+  try {
+    const sessionId = req.params.id;
+    const { turns } = req.body;
+
+    if (!Array.isArray(turns) || turns.length === 0) {
+      return res.status(400).json({ error: 'Invalid turn data' });
+    }
+
+    if (turns.length > MAX_TURNS_PER_BATCH) {
+      return res.status(400).json({ error: `Too many turns (max ${MAX_TURNS_PER_BATCH})` });
+    }
+
+    const invalid = turns.some(turn =>
+      !turn || !turn.speaker || !turn.text || !['user', 'assistant'].includes(turn.speaker)
+    );
+    if (invalid) {
+      return res.status(400).json({ error: 'Invalid turn data' });
+    }
+
+    // Verify session exists (no user check since agent is calling this)
+    const session = await db.prepare('SELECT id FROM sessions WHERE id = ?')
+      .get(sessionId);
+
+    if (!session) {
+      return res.status(404).json({ error: 'Session not found' });
+    }
+
+    // A single multi-row INSERT is atomic on both PostgreSQL and SQLite, so a
+    // failure leaves none of the batch saved rather than part of it
+    const ids = [];
+    const params = [];
+    for (const { speaker, text, timestamp } of turns) {
+      const turnId = `turn-${crypto.randomUUID()}`;
+      params.push(turnId, sessionId, timestamp || new Date().toISOString(), speaker, text);
+      ids.push(turnId);
+    }
+    const placeholders = turns.map(() => '(?, ?, ?, ?, ?)').join(', ');
+    await db.prepare(`
+      INSERT INTO turns (id, session_id, timestamp, speaker, text)
+      VALUES ${placeholders}
+    `).run(...params);
+    console.log(`📝 Saved ${ids.length} turns for session ${sessionId}`);
+    res.status(201).json({ ids });
+  } catch (error) {
+    console.error('Log turns batch error:', error);
+    res.status(500).json({ error: error.message });
+  }
+});
+
 // 4. GET /v1/sessions - Fetch user's sessions
 app.get('/v1/sessions', authenticateToken, async (req, res) => {
   try {